@@ -0,0 +1,25 @@
+// Renders every chart of the dashboard from a single JSON data file.
+// The data file URL is passed through the `data-src` attribute of this script tag.
+(function () {
+  const dataUrl = document.currentScript.dataset.src;
+
+  fetch(dataUrl)
+    .then((resp) => resp.json())
+    .then(({ layout, charts }) => {
+      for (const chart of charts) {
+        const chartLayout = JSON.parse(JSON.stringify(layout));
+        chartLayout.title.text = chart.title;
+        chartLayout.yaxis.title = { text: chart.y_axis_title };
+        chartLayout.yaxis.range = chart.y_axis_range;
+        const traces = chart.traces.map(({ name, x, y, text }) => ({
+          type: "scatter",
+          mode: "lines+markers",
+          x,
+          y,
+          ...(name === null ? {} : { name }),
+          ...(text === null ? {} : { text }),
+        }));
+        Plotly.newPlot(chart.id, traces, chartLayout, { responsive: true });
+      }
+    });
+})();
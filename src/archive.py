@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+ARCHIVE_DIR = Path("archive")
+INDEX_FILE = "index.json.gz"
+
+logger = logging.getLogger(__name__)
+
+# Functions returning the identity of a raw GitHub object. Objects of other resources are
+# identified by their "id".
+ITEM_KEYS = {
+    "commits": lambda item: item["sha"],
+    "stargazers": lambda item: (item["user"] or {}).get("id"),
+}
+
+
+def item_key(resource, item):
+    key = ITEM_KEYS.get(resource, lambda item: item["id"])(item)
+    return str(key)
+
+
+def content_hash(item):
+    payload = json.dumps(item, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def read_json_gz(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_gz(path, obj):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def read_partition(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def dedupe(resource, batches, keys=None):
+    """
+    Merges batches of raw objects ordered from oldest to newest, keeping the newest version of
+    each object. If `keys` is given, only the objects with these keys are kept, e.g. to drop
+    objects that are gone from the latest fetch.
+    """
+    items = {}
+    for batch in batches:
+        for item in batch:
+            items[item_key(resource, item)] = item
+    if keys is not None:
+        return [item for key, item in items.items() if key in keys]
+    return list(items.values())
+
+
+class Archive:
+    """
+    Append-only archive of the raw objects fetched from GitHub, stored as gzipped NDJSON:
+
+        <root>/<scope>/<resource>/<fetch date>/part-00000.ndjson.gz
+
+    where `scope` is a repository full name (e.g. "mlflow/mlflow") or "orgs/<org>". An index of
+    the content hash of every archived object is kept per resource, so that an object is only
+    archived again when it has changed since it was last fetched.
+
+    Every fetch is also recorded by a `fetch-00000.keys.json.gz` marker holding the keys of all
+    the objects it returned, even when nothing changed or the fetch returned nothing. For
+    resources fetched in full, the keys of the latest fetch are the current snapshot of the
+    resource: archived objects missing from it (e.g. members who left the org, or removed stars)
+    have been removed on GitHub since.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+
+    def resource_dir(self, scope, resource):
+        return self.root.joinpath(scope, resource)
+
+    def read_index(self, directory):
+        path = directory.joinpath(INDEX_FILE)
+        if not path.exists():
+            return {}
+        return read_json_gz(path)
+
+    def write(self, scope, resource, items, fetched_at=None):
+        """
+        Appends the objects in `items` that are new or changed to a new partition file, records
+        the fetch, and returns the number of objects written.
+        """
+        directory = self.resource_dir(scope, resource)
+        index = self.read_index(directory)
+        keys = []
+        changed = {}
+        for item in items:
+            key = item_key(resource, item)
+            keys.append(key)
+            digest = content_hash(item)
+            if index.get(key) != digest:
+                changed[key] = (digest, item)
+
+        partition = directory.joinpath((fetched_at or datetime.now()).strftime("%Y-%m-%d"))
+        partition.mkdir(parents=True, exist_ok=True)
+        # Parts and fetch markers of the same fetch share a number, which increases with every
+        # fetch of the day
+        number = len(list(partition.glob("part-*.ndjson.gz"))) + len(
+            list(partition.glob("fetch-*.keys.json.gz"))
+        )
+        if changed:
+            path = partition.joinpath(f"part-{number:05d}.ndjson.gz")
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                for _, item in changed.values():
+                    f.write(json.dumps(item, separators=(",", ":")) + "\n")
+            index.update({key: digest for key, (digest, _) in changed.items()})
+            write_json_gz(directory.joinpath(INDEX_FILE), index)
+            logger.info(f"Archived {len(changed)} {resource} of {scope} into {path}")
+
+        # Written last, so that a marker implies the objects of the fetch are archived
+        write_json_gz(
+            partition.joinpath(f"fetch-{number:05d}.keys.json.gz"), list(dict.fromkeys(keys))
+        )
+        return len(changed)
+
+    def fetches(self, scope, resource):
+        """
+        Returns the fetch markers of `resource` from oldest to newest.
+        """
+        return sorted(self.resource_dir(scope, resource).glob("*/fetch-*.keys.json.gz"))
+
+    def latest_keys(self, scope, resource):
+        """
+        Returns the keys of the objects returned by the latest fetch of `resource`, or None for
+        archives written before fetches were recorded.
+        """
+        fetches = self.fetches(scope, resource)
+        if not fetches:
+            return None
+        return set(read_json_gz(fetches[-1]))
+
+    def has_fetched(self, scope, resource):
+        # Archives written before fetch markers existed only have parts
+        return bool(self.fetches(scope, resource) or self.partitions(scope, resource))
+
+    def partitions(self, scope, resource):
+        """
+        Returns the partition files of `resource` from oldest to newest.
+        """
+        return sorted(self.resource_dir(scope, resource).glob("*/part-*.ndjson.gz"))
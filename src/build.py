@@ -1,16 +1,41 @@
+import gzip
+import hashlib
+import json
 import logging
+import os
 import shutil
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import itertools
+from typing import Any, List, NamedTuple, Optional, Tuple
 
 
 import pandas as pd
 import plotly.graph_objects as go
 from dateutil.relativedelta import relativedelta
+from plotly.offline import get_plotlyjs_version
+
+from config import load_config
+from loader import load_tables
+from rolling import sliding_window_history
+from tdigest import TDigest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump this to invalidate every fingerprint when the rendering code changes
+FINGERPRINT_VERSION = 2
+FINGERPRINTS_FILE = ".fingerprints.json"
+OUTPUT_MODES = ("iframes", "dashboard")
+# Only text assets are worth pre-compressing, images such as PNGs are compressed already
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".json", ".svg"}
 
 
 def count_by_month(df, datetime_col):
@@ -35,15 +60,16 @@ def count_by_month(df, datetime_col):
 
 
 def get_y_axis_range(*ys):
-    return [0, int(max(itertools.chain.from_iterable(ys)) * 1.125)]
+    # A chart without data in the last 12 months still gets a non-empty range
+    y_max = max(itertools.chain.from_iterable(ys), default=0)
+    return [0, max(int(y_max * 1.125), 1)]
 
 
-def make_plot(*traces, title, x_tick_vals, x_axis_range, y_axis_range):
-    fig = go.Figure()
-    fig.update_layout(
+def make_layout(title, x_tick_vals, x_axis_range, y_axis_range, y_axis_title="Count"):
+    return dict(
         title=dict(text=title, font=dict(size=25)),
         yaxis=dict(
-            title="Count",
+            title=dict(text=y_axis_title),
             range=y_axis_range,
         ),
         legend=dict(
@@ -60,336 +86,240 @@ def make_plot(*traces, title, x_tick_vals, x_axis_range, y_axis_range):
             range=x_axis_range,
         ),
     )
+
+
+def make_plot(*traces, title, x_tick_vals, x_axis_range, y_axis_range, y_axis_title="Count"):
+    fig = go.Figure()
+    fig.update_layout(**make_layout(title, x_tick_vals, x_axis_range, y_axis_range, y_axis_title))
     fig.add_traces(traces)
     return fig
 
 
-# Add avatar image to the table
-def get_avatar_img(row):
-    user_id = row["user_id"]
-    return f'<img src="https://avatars.githubusercontent.com/u/{user_id}" width="20" height="20" />'
+def format_dates(values):
+    # to_datetime also handles empty (object dtype) series, e.g. a month range without data
+    return pd.to_datetime(pd.Series(values)).dt.strftime("%Y-%m-%d").tolist()
 
 
-def main():
-    pd.options.plotting.backend = "plotly"
-    dist_dir = Path("dist")
-    if dist_dir.exists():
-        shutil.rmtree(dist_dir)
-    dist_assets = dist_dir.joinpath("assets")
-    plots_dir = dist_assets.joinpath("plots")
-    tables_dir = dist_assets.joinpath("tables")
-    plots_dir.mkdir(parents=True, exist_ok=True)
-    tables_dir.mkdir(parents=True, exist_ok=True)
-    db_path = Path("github.sqlite")
+def fingerprint(obj):
+    payload = json.dumps([FINGERPRINT_VERSION, obj], default=str, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    now = datetime.now()
-    this_month = datetime(now.year, now.month, 1)
-    firs_commit_date = datetime(2018, 6, 5)
-    x_tick_vals = pd.date_range(
-        firs_commit_date,
-        this_month,
-        freq="3MS",
-        inclusive="both",
-    )
-    year_ago = this_month - relativedelta(months=12)
-    x_axis_range = pd.date_range(
-        year_ago,
-        this_month,
-        freq="MS",
-        inclusive="both",
-    )
-    x_axis_range = [
-        x_axis_range[0] + relativedelta(days=-15),
-        x_axis_range[-1] + relativedelta(days=15),
-    ]
 
-    with sqlite3.connect(db_path) as conn:
-        # set dataframe display width
-        pd.set_option("display.max_colwidth", 300)
-        # Contributors
-        raw_commits = pd.read_sql("SELECT * FROM commits", conn)
-        raw_commits["date"] = pd.to_datetime(raw_commits["date"])
-        raw_commits["user_url"] = raw_commits["user_login"].apply(
-            lambda login: f"https://github.com/{login}"
-        )
-        users = pd.read_sql("SELECT * FROM users", conn)
-        mlflow_org_members = pd.read_sql("SELECT * FROM mlflow_org_members", conn)
-        # Filter out commits from mlflow org members
-        commits = raw_commits.merge(
-            mlflow_org_members.rename(columns={"id": "user_id"}).drop("login", axis=1),
-            on="user_id",
-            how="outer",
-            indicator=True,
-        )
-        commits = commits[(commits._merge == "left_only")].drop("_merge", axis=1)
-        commits = commits.merge(users.rename(columns={"id": "user_id"}), on="user_id")
-        first_commits = commits.sort_values("date").groupby("user_name").head(1)
-        contributors_by_month = count_by_month(first_commits, "date")
-        contributors_plot_path = plots_dir.joinpath("contributors.html")
-        make_plot(
-            go.Scatter(
-                x=contributors_by_month["date"],
-                y=contributors_by_month["count"],
-                mode="lines+markers",
-            ),
-            title="First-time contributors (excluding maintainers)",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                contributors_by_month[contributors_by_month["date"] >= year_ago]["count"]
-            ),
-        ).write_html(contributors_plot_path, include_plotlyjs="cdn")
+def file_fingerprint(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
 
-        commits_url_template = (
-            "https://github.com/mlflow/mlflow/commits?author={author}&since={since}&until={until}"
-        )
-        anchor_template = '<a href="{url}">{text}</a>'
-        six_month_ago = now - relativedelta(months=6)
-        active_contributors = (
-            commits[commits["date"] >= six_month_ago]
-            .groupby(["user_url", "user_login", "user_id"])
-            # Latest commit
-            .agg({"date": "max", "id": "count"})
-            # .count()
-            .sort_values("id", ascending=False)
-            .head(10)[["id", "date"]]
-            .rename(columns={"id": "PRs", "date": "last_commit_date"})
-            .reset_index()
-            .assign(
-                commits=lambda df: df.apply(
-                    lambda row: commits_url_template.format(
-                        author=row["user_login"],
-                        since=six_month_ago.strftime("%Y-%m-%d"),
-                        until=now.strftime("%Y-%m-%d"),
-                    ),
-                    axis=1,
-                )
-            )
-            .assign(
-                user=lambda df: df.apply(
-                    lambda row: anchor_template.format(url=row["user_url"], text=row["user_login"]),
-                    axis=1,
-                ),
-                PRs=lambda df: df.apply(
-                    lambda row: anchor_template.format(url=row["commits"], text=row["PRs"]),
-                    axis=1,
-                ),
-            )
-            .assign(avatar=lambda df: df.apply(lambda row: get_avatar_img(row), axis=1))
-            .assign(
-                last_commit_date=lambda df: df.apply(
-                    lambda row: row["last_commit_date"].strftime("%Y-%m-%d"), axis=1
-                )
-            )
-            .drop(["user_login", "user_url", "commits"], axis=1)[
-                ["user", "avatar", "PRs", "last_commit_date"]
-            ]
-            .rename(columns={"PRs": "PRs (within last 6 months)"})
-        )
 
-        active_contributors_path = tables_dir.joinpath("active_contributors.html")
-        active_contributors.to_html(
-            active_contributors_path,
-            escape=False,
-            index=False,
-            justify="center",
-        )
+class Trace(NamedTuple):
+    x: Any
+    y: Any
+    name: Optional[str] = None
+    # Hover text of each point
+    text: Any = None
 
-        first_commits = raw_commits.sort_values("date").groupby("user_name").head(1)
-        total_contributors_by_month = count_by_month(first_commits, "date")
-        total_contributors_by_month["count"] = total_contributors_by_month["count"].cumsum()
-        total_contributors_path = plots_dir.joinpath("total_contributors.html")
-        make_plot(
-            go.Scatter(
-                x=total_contributors_by_month["date"],
-                y=total_contributors_by_month["count"],
-                mode="lines+markers",
-            ),
-            title="Contributors (including maintainers)",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                total_contributors_by_month[total_contributors_by_month["date"] >= year_ago][
-                    "count"
-                ]
-            ),
-        ).write_html(total_contributors_path, include_plotlyjs="cdn")
-
-        # Number of commits
-        commits_count = (
-            raw_commits.groupby(raw_commits["date"].dt.to_period("M"))
-            .count()
-            .rename(columns={"id": "count"})[["count"]]
-            .reset_index()
-        )
-        commits_count["date"] = commits_count["date"].dt.start_time
-        commits_count["count"] = commits_count["count"].cumsum()
-        commits_count_path = plots_dir.joinpath("commits.html")
-        make_plot(
-            go.Scatter(
-                x=commits_count["date"],
-                y=commits_count["count"],
-                mode="lines+markers",
-            ),
-            title="Commits (on master branch)",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                commits_count[commits_count["date"] >= year_ago]["count"]
-            ),
-        ).write_html(commits_count_path, include_plotlyjs="cdn")
 
-        # Discussions
-        stargazers = pd.read_sql("SELECT * FROM stargazers", conn)
-        stargazers["starred_at"] = pd.to_datetime(stargazers["starred_at"])
-        stargazers_by_month = count_by_month(stargazers, "starred_at")
-        stargazers_plot_path = plots_dir.joinpath("stargazers.html")
-        make_plot(
-            go.Scatter(
-                x=stargazers_by_month["date"],
-                y=stargazers_by_month["count"],
-                mode="lines+markers",
-            ),
-            title="Stargazers",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                stargazers_by_month[stargazers_by_month["date"] >= year_ago]["count"]
-            ),
-        ).write_html(stargazers_plot_path, include_plotlyjs="cdn")
-
-        # Discussions
-        discussions = pd.read_sql("SELECT * FROM discussions", conn)
-        discussions["created_at"] = pd.to_datetime(discussions["created_at"])
-        discussions["updated_at"] = pd.to_datetime(discussions["updated_at"])
-        discussions_by_month = count_by_month(discussions, "created_at")
-        discussions_plot_path = plots_dir.joinpath("discussions.html")
-        make_plot(
-            go.Scatter(
-                x=discussions_by_month["date"],
-                y=discussions_by_month["count"],
-                mode="lines+markers",
-            ),
-            title="Discussions",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                discussions_by_month[discussions_by_month["date"] >= year_ago]["count"]
-            ),
-        ).write_html(discussions_plot_path, include_plotlyjs="cdn")
-
-        issues = pd.read_sql("SELECT * FROM issues", conn)
-        issues["closed_at"] = pd.to_datetime(issues["closed_at"])
-        issues["created_at"] = pd.to_datetime(issues["created_at"])
-        issues["updated_at"] = pd.to_datetime(issues["updated_at"])
-
-        # Issues
-        opened_issues = issues[issues["is_pr"] == 0]
-        opened_issues_by_month = count_by_month(opened_issues, "created_at")
-        closed_issues = opened_issues[opened_issues["state"] == "closed"]
-        closed_issues_by_month = count_by_month(closed_issues, "closed_at")
-        issues_plot_path = plots_dir.joinpath("issues.html")
-        make_plot(
-            go.Scatter(
-                x=opened_issues_by_month["date"],
-                y=opened_issues_by_month["count"],
-                mode="lines+markers",
-                name="Opened",
-            ),
-            go.Scatter(
-                x=closed_issues_by_month["date"],
-                y=closed_issues_by_month["count"],
-                mode="lines+markers",
-                name="Closed",
-            ),
-            title="Issues",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                opened_issues_by_month[opened_issues_by_month["date"] >= year_ago]["count"],
-                closed_issues_by_month[closed_issues_by_month["date"] >= year_ago]["count"],
-            ),
-        ).write_html(issues_plot_path, include_plotlyjs="cdn")
-
-        # Pull requests (maintainers)
-        opened_pulls = issues[issues["is_pr"] == 1]
-        opened_pulls = opened_pulls.merge(
-            mlflow_org_members.rename(columns={"id": "user_id"}).drop("login", axis=1),
-            on="user_id",
-            how="outer",
-            indicator=True,
-        )
-        opened_pulls = opened_pulls[(opened_pulls._merge == "both")].drop("_merge", axis=1)
-        opened_pulls_by_month = count_by_month(opened_pulls, "created_at")
-        closed_pulls = opened_pulls[opened_pulls["state"] == "closed"]
-        closed_pulls_by_month = count_by_month(closed_pulls, "closed_at")
-        pulls_maintainers_plot_path = plots_dir.joinpath("pulls_all.html")
-        make_plot(
-            go.Scatter(
-                x=opened_pulls_by_month["date"],
-                y=opened_pulls_by_month["count"],
-                mode="lines+markers",
-                name="Opened",
-            ),
-            go.Scatter(
-                x=closed_pulls_by_month["date"],
-                y=closed_pulls_by_month["count"],
-                mode="lines+markers",
-                name="Closed",
-            ),
-            title="Pull Requests (maintainers)",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                opened_pulls_by_month[opened_pulls_by_month["date"] >= year_ago]["count"],
-                closed_pulls_by_month[closed_pulls_by_month["date"] >= year_ago]["count"],
-            ),
-        ).write_html(pulls_maintainers_plot_path, include_plotlyjs="cdn")
-
-        # Pull requests (non maintainers)
-        opened_pulls = issues[issues["is_pr"] == 1]
-        # Filter out commits from mlflow org members
-        opened_pulls = opened_pulls.merge(
-            mlflow_org_members.rename(columns={"id": "user_id"}).drop("login", axis=1),
-            on="user_id",
-            how="outer",
-            indicator=True,
+class PlotJob(NamedTuple):
+    filename: str
+    title: str
+    traces: tuple
+    x_tick_vals: Any
+    x_axis_range: list
+    y_axis_range: list
+    y_axis_title: str = "Count"
+
+    def fingerprint(self):
+        return fingerprint(
+            {
+                "title": self.title,
+                "traces": [
+                    {
+                        "name": t.name,
+                        "x": [str(v) for v in t.x],
+                        "y": [str(v) for v in t.y],
+                        "text": None if t.text is None else [str(v) for v in t.text],
+                    }
+                    for t in self.traces
+                ],
+                "x_tick_vals": [str(v) for v in self.x_tick_vals],
+                "x_axis_range": [str(v) for v in self.x_axis_range],
+                "y_axis_range": self.y_axis_range,
+                "y_axis_title": self.y_axis_title,
+            }
         )
-        opened_pulls = opened_pulls[(opened_pulls._merge == "left_only")].drop("_merge", axis=1)
-        opened_pulls_by_month = count_by_month(opened_pulls, "created_at")
-        closed_pulls = opened_pulls[opened_pulls["state"] == "closed"]
-        closed_pulls_by_month = count_by_month(closed_pulls, "closed_at")
-        pulls_non_maintainers_plot_path = plots_dir.joinpath("pulls_non_maintainers.html")
+
+    def render(self, path):
+        # A fixed div id (plotly generates a random one by default) keeps the output
+        # reproducible regardless of which process renders it
         make_plot(
-            go.Scatter(
-                x=opened_pulls_by_month["date"],
-                y=opened_pulls_by_month["count"],
-                mode="lines+markers",
-                name="Opened",
-            ),
-            go.Scatter(
-                x=closed_pulls_by_month["date"],
-                y=closed_pulls_by_month["count"],
-                mode="lines+markers",
-                name="Closed",
-            ),
-            title="Pull Requests (non-maintainers)",
-            x_tick_vals=x_tick_vals,
-            x_axis_range=x_axis_range,
-            y_axis_range=get_y_axis_range(
-                opened_pulls_by_month[opened_pulls_by_month["date"] >= year_ago]["count"],
-                closed_pulls_by_month[closed_pulls_by_month["date"] >= year_ago]["count"],
+            *(
+                go.Scatter(x=t.x, y=t.y, mode="lines+markers", name=t.name, text=t.text)
+                for t in self.traces
             ),
-        ).write_html(pulls_non_maintainers_plot_path, include_plotlyjs="cdn")
+            title=self.title,
+            x_tick_vals=self.x_tick_vals,
+            x_axis_range=self.x_axis_range,
+            y_axis_range=self.y_axis_range,
+            y_axis_title=self.y_axis_title,
+        ).write_html(path, include_plotlyjs="cdn", div_id=self.id)
+
+    @property
+    def id(self):
+        return Path(self.filename).stem
+
+    def to_dict(self):
+        """
+        Returns the chart as column-oriented arrays for the dashboard data file. The x-axis
+        layout is shared by all charts and stored once in the data file.
+        """
+        return {
+            "id": self.id,
+            "title": self.title,
+            "y_axis_title": self.y_axis_title,
+            "y_axis_range": self.y_axis_range,
+            "traces": [
+                {
+                    "name": t.name,
+                    "x": format_dates(t.x),
+                    "y": pd.Series(t.y).tolist(),
+                    "text": None if t.text is None else list(t.text),
+                }
+                for t in self.traces
+            ],
+        }
+
+
+def render_plot(plot, path):
+    plot.render(path)
+    return path
 
-        iframe_html_template = """
+
+def get_num_workers():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def render_plots(jobs, max_workers=None):
+    """
+    Renders `(plot, path)` pairs across a process pool.
+    """
+    max_workers = min(max_workers or get_num_workers(), len(jobs))
+    if max_workers <= 1:
+        for plot, path in jobs:
+            render_plot(plot, path)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(render_plot, plot, path) for plot, path in jobs]
+        for future in futures:
+            logger.info(f"Rendered {future.result()}")
+
+
+def make_plot_job(
+    filename, *counts, title, x_tick_vals, x_axis_range, year_ago, y_axis_title="Count"
+):
+    """
+    Creates a `PlotJob` from `(count_by_month_df, trace_name)` pairs. An optional `text` column
+    is used as the hover text.
+    """
+    return PlotJob(
+        filename=filename,
+        title=title,
+        traces=tuple(
+            Trace(x=df["date"], y=df["count"], name=name, text=df.get("text"))
+            for df, name in counts
+        ),
+        x_tick_vals=x_tick_vals,
+        x_axis_range=x_axis_range,
+        y_axis_range=get_y_axis_range(*(df[df["date"] >= year_ago]["count"] for df, _ in counts)),
+        y_axis_title=y_axis_title,
+    )
+
+
+class IncrementalWriter:
+    """
+    Tracks a fingerprint for every output file under `dist_dir` so that outputs whose inputs
+    have not changed since the previous build are not regenerated.
+    """
+
+    def __init__(self, dist_dir):
+        self.dist_dir = dist_dir
+        self.fingerprints_path = dist_dir.joinpath(FINGERPRINTS_FILE)
+        self.previous = {}
+        if self.fingerprints_path.exists():
+            self.previous = json.loads(self.fingerprints_path.read_text())
+        self.current = {}
+
+    def add(self, path, fingerprint):
+        key = path.relative_to(self.dist_dir).as_posix()
+        self.current[key] = fingerprint
+        return key
+
+    def is_stale(self, path, fingerprint):
+        key = self.add(path, fingerprint)
+        if path.exists() and self.previous.get(key) == fingerprint:
+            logger.info(f"Skipping {key} (unchanged)")
+            return False
+        return True
+
+    def write_asset(self, directory, name, data):
+        """
+        Writes `data` under a content-hashed file name together with pre-compressed copies of
+        text assets.
+        """
+        name = Path(name)
+        digest = hashlib.sha256(data).hexdigest()
+        path = directory.joinpath(f"{name.stem}.{digest[:12]}{name.suffix}")
+        self.write_compressed(path, data, digest)
+        return path
+
+    def write_compressed(self, path, data, digest=None):
+        digest = digest or hashlib.sha256(data).hexdigest()
+        outputs = [(path, lambda: data)]
+        if path.suffix in COMPRESSIBLE_SUFFIXES:
+            outputs.append((path.with_name(path.name + ".gz"), lambda: gzip_data(data)))
+            if brotli is not None:
+                outputs.append((path.with_name(path.name + ".br"), lambda: brotli.compress(data)))
+        for output, compress in outputs:
+            if self.is_stale(output, digest):
+                output.write_bytes(compress())
+
+    def prune(self):
+        for path in sorted(self.dist_dir.rglob("*"), reverse=True):
+            key = path.relative_to(self.dist_dir).as_posix()
+            if path.is_file() and key != FINGERPRINTS_FILE and key not in self.current:
+                logger.info(f"Removing obsolete {key}")
+                path.unlink()
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+
+    def save(self):
+        self.fingerprints_path.write_text(json.dumps(self.current, indent=2, sort_keys=True))
+
+
+def gzip_data(data):
+    # A fixed mtime keeps the compressed output reproducible
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+iframe_html_template = """
 <iframe
   style="border: none"
   src="{src}"
   width="50%"
   height="500px"
 ></iframe>"""
-        index_html_template = """
+
+chart_html_template = """
+<div id="{id}" style="width: 50%; height: 500px"></div>"""
+
+dashboard_scripts_template = """
+<script src="{plotly_js}"></script>
+<script src="{dashboard_js}" data-src="{data}"></script>"""
+
+nav_html_template = """
+    <div style="text-align: center; font-family: Arial;">{links}</div>"""
+
+index_html_template = """
 <!DOCTYPE html>
 <html lang="en">
   <head>
@@ -397,7 +327,7 @@ def main():
     <meta http-equiv="X-UA-Compatible" content="IE=edge" />
     <meta name="viewport" content="width=device-width, initial-scale=1.0" />
     <link rel="icon" href="{favicon}" sizes="any" type="image/svg+xml">
-    <title>MLflow Repository Status</title>
+    <title>{title}</title>
     <style>
       table {{
         margin: auto;
@@ -412,13 +342,13 @@ def main():
   </head>
   <body>
     <div style="text-align: center">
-      <a href="https://github.com/mlflow/mlflow">
+      <a href="{url}">
         <img src="{logo}" alt="logo" height="100px" />
       </a>
       <h1 style="font-family: Arial;">
         Repository Status (updated at {updated_at})
       </h1>
-    </div>
+    </div>{nav}
     <div style="text-align: center">
       <h2 style="font-family: Arial;">
         Thank you for your contributions!
@@ -429,36 +359,545 @@ def main():
   </body>
 </html>
 """
-    plot_tile = [
-        [contributors_plot_path, total_contributors_path],
-        [pulls_maintainers_plot_path, pulls_non_maintainers_plot_path],
-        [stargazers_plot_path, issues_plot_path],
-        [discussions_plot_path, commits_count_path],
-    ]
+
+
+class Page(NamedTuple):
+    title: str
+    url: str
+    # Directory of the page relative to the dist directory
+    dir: Path
+    # Full names of the repositories aggregated in the page
+    repos: List[str]
+    first_commit_date: Optional[datetime]
+    commits_url_template: str
+    links: List[Tuple[str, str]] = []
+
+
+def get_pages(config):
+    """
+    Returns a page per repository, plus an aggregate page when there are several repositories.
+    """
+    repo_url_template = "{url}/commits?author={{author}}&since={{since}}&until={{until}}"
+    if len(config.repos) == 1:
+        (repo,) = config.repos
+        return [
+            Page(
+                title=config.title,
+                url=repo.url,
+                dir=Path("."),
+                repos=[repo.full_name],
+                first_commit_date=repo.first_commit_date,
+                commits_url_template=repo_url_template.format(url=repo.url),
+            )
+        ]
+
+    first_commit_dates = [r.first_commit_date for r in config.repos if r.first_commit_date]
+    aggregate = Page(
+        title=config.title,
+        url=f"https://github.com/{config.org}",
+        dir=Path("."),
+        repos=[r.full_name for r in config.repos],
+        first_commit_date=min(first_commit_dates) if first_commit_dates else None,
+        commits_url_template=(
+            f"https://github.com/search?q=org%3A{config.org}+author%3A{{author}}"
+            "+committer-date%3A{since}..{until}&type=commits"
+        ),
+        links=[(r.full_name, f"{r.full_name}/index.html") for r in config.repos],
+    )
+    pages = [aggregate]
+    for repo in config.repos:
+        pages.append(
+            Page(
+                title=f"{repo.full_name} Repository Status",
+                url=repo.url,
+                dir=Path(repo.owner, repo.repo),
+                repos=[repo.full_name],
+                first_commit_date=repo.first_commit_date,
+                commits_url_template=repo_url_template.format(url=repo.url),
+                links=[("All repositories", "../../index.html")],
+            )
+        )
+    return pages
+
+
+def relative_url(path, start):
+    return Path(os.path.relpath(path, start)).as_posix()
+
+
+def write_iframes(plot_tile, writer, page_dir, plots_dir):
+    """
+    Returns the iframes embedding each chart and the `(plot, path)` pairs that need to be
+    rendered into their own HTML file.
+    """
+    render_jobs = []
+    for plot in itertools.chain.from_iterable(plot_tile):
+        plot_path = plots_dir.joinpath(plot.filename)
+        if writer.is_stale(plot_path, plot.fingerprint()):
+            render_jobs.append((plot, plot_path))
 
     plots_html = ""
     for plots in plot_tile:
         iframes = []
         for plot in plots:
-            iframes.append(iframe_html_template.format(src=plot.relative_to(dist_dir)))
+            src = plots_dir.joinpath(plot.filename).relative_to(page_dir)
+            iframes.append(iframe_html_template.format(src=src))
         plots_html += '<div style="display: flex">{plots}</div>'.format(plots="".join(iframes))
+    return plots_html, render_jobs
+
+
+def write_dashboard(plot_tile, writer, page_dir, page_assets, dashboard_js_path):
+    """
+    Writes the series of all charts into a single JSON data file rendered on one page by
+    `assets/dashboard.js`, and returns the chart containers and scripts for the index.
+    """
+    plots = list(itertools.chain.from_iterable(plot_tile))
+    first = plots[0]
+    layout = make_layout(
+        title="",
+        x_tick_vals=format_dates(first.x_tick_vals),
+        x_axis_range=format_dates(first.x_axis_range),
+        y_axis_range=None,
+    )
+    data = {"layout": layout, "charts": [plot.to_dict() for plot in plots]}
+    data_path = writer.write_asset(
+        page_assets, "data.json", json.dumps(data, separators=(",", ":")).encode("utf-8")
+    )
+
+    plots_html = ""
+    for row in plot_tile:
+        charts = "".join(chart_html_template.format(id=plot.id) for plot in row)
+        plots_html += '<div style="display: flex">{plots}</div>'.format(plots=charts)
+    plots_html += dashboard_scripts_template.format(
+        plotly_js=f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js",
+        dashboard_js=relative_url(dashboard_js_path, page_dir),
+        data=data_path.relative_to(page_dir).as_posix(),
+    )
+    return plots_html
+
+
+def quantiles_by_month(sketches, *qs):
+    """
+    Merges the t-digests of each month (e.g. of several repositories) and returns a
+    `count_by_month`-like frame for each quantile in `qs`.
+    """
+    rows = {q: [] for q in qs}
+    for month, digests in sketches.groupby("month")["digest"]:
+        digest = TDigest()
+        for d in digests:
+            digest.merge(TDigest.from_dict(json.loads(d)))
+        for q in qs:
+            rows[q].append({"date": month, "count": digest.quantile(q)})
+    return [pd.DataFrame(rows[q], columns=["date", "count"]) for q in qs]
 
-    logo = Path("assets", "MLflow-logo-final-black.png")
-    favicon = Path("assets", "icon.svg")
-    logo_dst = dist_assets.joinpath(logo.name)
-    favicon_dst = dist_assets.joinpath(favicon.name)
-    shutil.copyfile(logo, logo_dst)
-    shutil.copyfile(favicon, favicon_dst)
-    index_html = dist_dir.joinpath("index.html")
-    index_html.write_text(
-        index_html_template.format(
-            logo=logo_dst.relative_to(dist_dir),
-            favicon=favicon_dst.relative_to(dist_dir),
-            updated_at=now.strftime("%Y-%m-%d %H:%M:%S"),
-            plots=plots_html,
-            active_contributors_table=active_contributors_path.read_text(),
+
+def active_contributors_by_month(commits, first_month, this_month, top=3):
+    """
+    Returns a `count_by_month`-like frame of the number of contributors who committed within
+    the 6 months up to each month, with the top contributors of each window as hover text.
+    """
+    commits = commits[commits["user_login"] != ""].sort_values("date")
+    months = pd.date_range(first_month, this_month, freq="MS")
+    history = sliding_window_history(
+        zip(commits["date"], commits["user_login"]),
+        months,
+        window=relativedelta(months=6),
+        top=top,
+    )
+    return pd.DataFrame(
+        {
+            "date": [snapshot.month for snapshot in history],
+            "count": [snapshot.active for snapshot in history],
+            "text": [
+                "<br>".join(f"{login} ({count})" for login, count in snapshot.top)
+                for snapshot in history
+            ],
+        }
+    )
+
+
+# Add avatar image to the table
+def get_avatar_img(row):
+    user_id = row["user_id"]
+    return f'<img src="https://avatars.githubusercontent.com/u/{user_id}" width="20" height="20" />'
+
+
+def get_axis_kwargs(first_commit_date, now):
+    this_month = datetime(now.year, now.month, 1)
+    x_tick_vals = pd.date_range(
+        first_commit_date,
+        this_month,
+        freq="3MS",
+        inclusive="both",
+    )
+    year_ago = this_month - relativedelta(months=12)
+    x_axis_range = pd.date_range(
+        year_ago,
+        this_month,
+        freq="MS",
+        inclusive="both",
+    )
+    x_axis_range = [
+        x_axis_range[0] + relativedelta(days=-15),
+        x_axis_range[-1] + relativedelta(days=15),
+    ]
+    return dict(x_tick_vals=x_tick_vals, x_axis_range=x_axis_range, year_ago=year_ago)
+
+
+def make_charts(frames, page, now):
+    """
+    Returns the chart tile and the active contributors table of `page`.
+    """
+    frames = {name: df[df["repo"].isin(page.repos)] for name, df in frames.items()}
+    raw_commits = frames["commits"]
+    users = frames["users"]
+    mlflow_org_members = frames["mlflow_org_members"]
+    stargazers = frames["stargazers"]
+    discussions = frames["discussions"]
+    issues = frames["issues"]
+
+    # A repository without commits starts at the current month unless configured otherwise
+    this_month = datetime(now.year, now.month, 1)
+    first_commit_date = raw_commits["date"].min()
+    if pd.isna(first_commit_date):
+        first_commit_date = this_month
+    axis_kwargs = get_axis_kwargs(page.first_commit_date or first_commit_date, now)
+
+    # Filter out commits from mlflow org members
+    commits = raw_commits.merge(
+        mlflow_org_members.rename(columns={"id": "user_id"}).drop("login", axis=1),
+        on=["repo", "user_id"],
+        how="outer",
+        indicator=True,
+    )
+    commits = commits[(commits._merge == "left_only")].drop("_merge", axis=1)
+    commits = commits.merge(users.rename(columns={"id": "user_id"}), on=["repo", "user_id"])
+    first_commits = commits.sort_values("date").groupby("user_name", observed=True).head(1)
+    contributors_by_month = count_by_month(first_commits, "date")
+    contributors_plot = make_plot_job(
+        "contributors.html",
+        (contributors_by_month, None),
+        title="First-time contributors (excluding maintainers)",
+        **axis_kwargs,
+    )
+
+    anchor_template = '<a href="{url}">{text}</a>'
+    six_month_ago = now - relativedelta(months=6)
+    # `result_type="reduce"` makes `apply` return a Series even when nobody committed in the
+    # last 6 months, instead of an empty frame that cannot be assigned to a column
+    active_contributors = (
+        commits[commits["date"] >= six_month_ago]
+        .groupby(["user_login", "user_id"], observed=True)
+        # Latest commit
+        .agg({"date": "max", "id": "count"})
+        # .count()
+        .sort_values("id", ascending=False)
+        .head(10)[["id", "date"]]
+        .rename(columns={"id": "PRs", "date": "last_commit_date"})
+        .reset_index()
+        # Profile URLs are only built for the contributors shown in the table
+        .assign(user_url=lambda df: "https://github.com/" + df["user_login"].astype(str))
+        .assign(
+            commits=lambda df: df.apply(
+                lambda row: page.commits_url_template.format(
+                    author=row["user_login"],
+                    since=six_month_ago.strftime("%Y-%m-%d"),
+                    until=now.strftime("%Y-%m-%d"),
+                ),
+                axis=1,
+                result_type="reduce",
+            )
+        )
+        .assign(
+            user=lambda df: df.apply(
+                lambda row: anchor_template.format(url=row["user_url"], text=row["user_login"]),
+                axis=1,
+                result_type="reduce",
+            ),
+            PRs=lambda df: df.apply(
+                lambda row: anchor_template.format(url=row["commits"], text=row["PRs"]),
+                axis=1,
+                result_type="reduce",
+            ),
+        )
+        .assign(
+            avatar=lambda df: df.apply(
+                lambda row: get_avatar_img(row), axis=1, result_type="reduce"
+            )
         )
+        .assign(
+            last_commit_date=lambda df: df.apply(
+                lambda row: row["last_commit_date"].strftime("%Y-%m-%d"),
+                axis=1,
+                result_type="reduce",
+            )
+        )
+        .drop(["user_login", "user_url", "commits"], axis=1)[
+            ["user", "avatar", "PRs", "last_commit_date"]
+        ]
+        .rename(columns={"PRs": "PRs (within last 6 months)"})
+    )
+
+    # Active contributors over time
+    active_contributors_history = active_contributors_by_month(
+        commits, datetime(first_commit_date.year, first_commit_date.month, 1), this_month
+    )
+    active_contributors_plot = make_plot_job(
+        "active_contributors.html",
+        (active_contributors_history, None),
+        title="Active contributors in the last 6 months (excluding maintainers)",
+        **axis_kwargs,
+    )
+
+    first_commits = raw_commits.sort_values("date").groupby("user_name", observed=True).head(1)
+    total_contributors_by_month = count_by_month(first_commits, "date")
+    total_contributors_by_month["count"] = total_contributors_by_month["count"].cumsum()
+    total_contributors_plot = make_plot_job(
+        "total_contributors.html",
+        (total_contributors_by_month, None),
+        title="Contributors (including maintainers)",
+        **axis_kwargs,
+    )
+
+    # Number of commits
+    commits_count = (
+        raw_commits.groupby(raw_commits["date"].dt.to_period("M"))
+        .count()
+        .rename(columns={"id": "count"})[["count"]]
+        .reset_index()
+    )
+    commits_count["date"] = commits_count["date"].dt.start_time
+    commits_count["count"] = commits_count["count"].cumsum()
+    commits_count_plot = make_plot_job(
+        "commits.html",
+        (commits_count, None),
+        title="Commits (on master branch)",
+        **axis_kwargs,
+    )
+
+    # Stargazers
+    stargazers_by_month = count_by_month(stargazers, "starred_at")
+    stargazers_plot = make_plot_job(
+        "stargazers.html",
+        (stargazers_by_month, None),
+        title="Stargazers",
+        **axis_kwargs,
+    )
+
+    # Discussions
+    discussions_by_month = count_by_month(discussions, "created_at")
+    discussions_plot = make_plot_job(
+        "discussions.html",
+        (discussions_by_month, None),
+        title="Discussions",
+        **axis_kwargs,
+    )
+
+    # Issues
+    opened_issues = issues[issues["is_pr"] == 0]
+    opened_issues_by_month = count_by_month(opened_issues, "created_at")
+    closed_issues = opened_issues[opened_issues["state"] == "closed"]
+    closed_issues_by_month = count_by_month(closed_issues, "closed_at")
+    issues_plot = make_plot_job(
+        "issues.html",
+        (opened_issues_by_month, "Opened"),
+        (closed_issues_by_month, "Closed"),
+        title="Issues",
+        **axis_kwargs,
+    )
+
+    # Pull requests (maintainers)
+    opened_pulls = issues[issues["is_pr"] == 1]
+    opened_pulls = opened_pulls.merge(
+        mlflow_org_members.rename(columns={"id": "user_id"}).drop("login", axis=1),
+        on=["repo", "user_id"],
+        how="outer",
+        indicator=True,
+    )
+    opened_pulls = opened_pulls[(opened_pulls._merge == "both")].drop("_merge", axis=1)
+    opened_pulls_by_month = count_by_month(opened_pulls, "created_at")
+    closed_pulls = opened_pulls[opened_pulls["state"] == "closed"]
+    closed_pulls_by_month = count_by_month(closed_pulls, "closed_at")
+    pulls_maintainers_plot = make_plot_job(
+        "pulls_all.html",
+        (opened_pulls_by_month, "Opened"),
+        (closed_pulls_by_month, "Closed"),
+        title="Pull Requests (maintainers)",
+        **axis_kwargs,
+    )
+
+    # Pull requests (non maintainers)
+    opened_pulls = issues[issues["is_pr"] == 1]
+    # Filter out commits from mlflow org members
+    opened_pulls = opened_pulls.merge(
+        mlflow_org_members.rename(columns={"id": "user_id"}).drop("login", axis=1),
+        on=["repo", "user_id"],
+        how="outer",
+        indicator=True,
+    )
+    opened_pulls = opened_pulls[(opened_pulls._merge == "left_only")].drop("_merge", axis=1)
+    opened_pulls_by_month = count_by_month(opened_pulls, "created_at")
+    closed_pulls = opened_pulls[opened_pulls["state"] == "closed"]
+    closed_pulls_by_month = count_by_month(closed_pulls, "closed_at")
+    pulls_non_maintainers_plot = make_plot_job(
+        "pulls_non_maintainers.html",
+        (opened_pulls_by_month, "Opened"),
+        (closed_pulls_by_month, "Closed"),
+        title="Pull Requests (non-maintainers)",
+        **axis_kwargs,
+    )
+
+    # Time to close, from the monthly t-digests computed while crawling
+    latency_sketches = frames["latency_sketches"]
+    latency_plots = []
+    for kind, filename, title in [
+        ("pr", "pulls_time_to_close.html", "Time to close (Pull Requests)"),
+        ("issue", "issues_time_to_close.html", "Time to close (Issues)"),
+    ]:
+        counts = []
+        for author, label in [("maintainer", "maintainers"), ("non_maintainer", "non-maintainers")]:
+            sketches = latency_sketches[
+                (latency_sketches["kind"] == kind) & (latency_sketches["author"] == author)
+            ]
+            median, p90 = quantiles_by_month(sketches, 0.5, 0.9)
+            counts += [(median, f"Median ({label})"), (p90, f"p90 ({label})")]
+        # Nothing was closed within the last 12 months, so there is nothing to chart
+        if all(df[df["date"] >= axis_kwargs["year_ago"]].empty for df, _ in counts):
+            logger.info(f"Skipping {filename}: no data in the last 12 months")
+            continue
+        latency_plots.append(
+            make_plot_job(filename, *counts, title=title, y_axis_title="Days", **axis_kwargs)
+        )
+
+    plot_tile = [
+        [contributors_plot, total_contributors_plot],
+        [active_contributors_plot, commits_count_plot],
+        [pulls_maintainers_plot, pulls_non_maintainers_plot],
+        latency_plots,
+        [stargazers_plot, issues_plot],
+        [discussions_plot],
+    ]
+    plot_tile = [row for row in plot_tile if row]
+    return plot_tile, active_contributors
+
+
+def write_page(page, frames, writer, dist_dir, static_assets, mode, now):
+    """
+    Writes the tables of `page`, and returns the charts that need to be rendered together with
+    the path and content of its index.
+    """
+    page_dir = dist_dir.joinpath(page.dir)
+    page_assets = page_dir.joinpath("assets")
+    plots_dir = page_assets.joinpath("plots")
+    tables_dir = page_assets.joinpath("tables")
+    plots_dir.mkdir(parents=True, exist_ok=True)
+
+    plot_tile, active_contributors = make_charts(frames, page, now)
+
+    active_contributors_html = active_contributors.to_html(
+        escape=False,
+        index=False,
+        justify="center",
     )
+    # The dashboard only inlines the table into the index
+    if mode != "dashboard":
+        tables_dir.mkdir(parents=True, exist_ok=True)
+        active_contributors_path = tables_dir.joinpath("active_contributors.html")
+        active_contributors_fingerprint = fingerprint(active_contributors.to_dict("split"))
+        if writer.is_stale(active_contributors_path, active_contributors_fingerprint):
+            active_contributors_path.write_text(active_contributors_html, encoding="utf-8")
+
+    render_jobs = []
+    if mode == "dashboard":
+        plots_html = write_dashboard(
+            plot_tile, writer, page_dir, page_assets, static_assets["dashboard.js"]
+        )
+    else:
+        plots_html, render_jobs = write_iframes(plot_tile, writer, page_dir, plots_dir)
+
+    nav_html = ""
+    if page.links:
+        links = " | ".join(f'<a href="{href}">{text}</a>' for text, href in page.links)
+        nav_html = nav_html_template.format(links=links)
+
+    index_html = page_dir.joinpath("index.html")
+    index_html_content = index_html_template.format(
+        title=page.title,
+        url=page.url,
+        logo=relative_url(static_assets["logo"], page_dir),
+        favicon=relative_url(static_assets["favicon"], page_dir),
+        updated_at=now.strftime("%Y-%m-%d %H:%M:%S"),
+        nav=nav_html,
+        plots=plots_html,
+        active_contributors_table=active_contributors_html,
+    )
+    return render_jobs, (index_html, index_html_content)
+
+
+def write_index(writer, index_html, content, mode):
+    # The index embeds the build time, so it is rewritten on every build
+    if mode == "dashboard":
+        writer.write_compressed(index_html, content.encode("utf-8"))
+    else:
+        writer.add(index_html, fingerprint(content))
+        index_html.write_text(content)
+
+
+def write_static_assets(writer, dist_assets, mode):
+    """
+    Copies the assets shared by all pages and returns their destinations.
+    """
+    dist_assets.mkdir(parents=True, exist_ok=True)
+    sources = {
+        "logo": Path("assets", "MLflow-logo-final-black.png"),
+        "favicon": Path("assets", "icon.svg"),
+    }
+    if mode == "dashboard":
+        sources["dashboard.js"] = Path("assets", "dashboard.js")
+        return {
+            name: writer.write_asset(dist_assets, src.name, src.read_bytes())
+            for name, src in sources.items()
+        }
+
+    destinations = {}
+    for name, src in sources.items():
+        dst = dist_assets.joinpath(src.name)
+        if writer.is_stale(dst, file_fingerprint(src)):
+            shutil.copyfile(src, dst)
+        destinations[name] = dst
+    return destinations
+
+
+def main(max_workers=None, mode="iframes", dist_dir=Path("dist")):
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode: {mode}, must be one of {OUTPUT_MODES}")
+    pd.options.plotting.backend = "plotly"
+    config = load_config()
+    dist_dir.mkdir(exist_ok=True)
+    db_path = Path("github.sqlite")
+    writer = IncrementalWriter(dist_dir)
+    now = datetime.now()
+
+    with sqlite3.connect(db_path) as conn:
+        # set dataframe display width
+        pd.set_option("display.max_colwidth", 300)
+        frames = load_tables(conn)
+
+    static_assets = write_static_assets(writer, dist_dir.joinpath("assets"), mode)
+    # Charts of all the pages are rendered at once so that they share one process pool
+    render_jobs = []
+    indexes = []
+    for page in get_pages(config):
+        page_jobs, index = write_page(page, frames, writer, dist_dir, static_assets, mode, now)
+        render_jobs += page_jobs
+        indexes.append(index)
+    render_plots(render_jobs, max_workers=max_workers)
+
+    # Indexes are only written once all the charts they embed have been rendered
+    for index_html, content in indexes:
+        write_index(writer, index_html, content, mode)
+
+    writer.prune()
+    writer.save()
 
 
 if __name__ == "__main__":
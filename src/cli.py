@@ -0,0 +1,168 @@
+"""
+Command line entry point for the repository status builder.
+
+Usage:
+
+    python src/cli.py dump      # crawl GitHub into github.sqlite and archive/
+    python src/cli.py reingest  # rebuild github.sqlite from archive/
+    python src/cli.py build     # render the webpage into dist/
+    python src/cli.py serve     # preview dist/ locally
+    python src/cli.py bench     # time the build
+    python src/cli.py status    # show what github.sqlite contains
+    python src/cli.py rate-limit
+
+Heavy dependencies (pandas, plotly, SQLAlchemy, ...) are imported inside the subcommand that
+needs them so that quick operations such as `status` or `rate-limit` start instantly.
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+DB_PATH = Path("github.sqlite")
+DIST_DIR = Path("dist")
+
+
+def run_dump(args):
+    import dump
+
+    dump.main(preview=args.preview, max_workers=args.workers)
+
+
+def run_reingest(args):
+    import dump
+
+    dump.reingest(preview=args.preview, max_workers=args.workers)
+
+
+def run_build(args):
+    import build
+
+    build.main(max_workers=args.jobs, mode=args.mode)
+
+
+def run_serve(args):
+    import functools
+    import http.server
+
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(DIST_DIR))
+    with http.server.ThreadingHTTPServer(("", args.port), handler) as server:
+        print(f"Serving {DIST_DIR} at http://localhost:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def run_bench(args):
+    import resource
+    import tempfile
+
+    started = time.perf_counter()
+    import build
+
+    import_time = time.perf_counter() - started
+    timings = []
+    for _ in range(args.repeat):
+        # Build into an empty directory every time, otherwise the incremental build skips all
+        # the outputs of the previous run
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            started = time.perf_counter()
+            build.main(max_workers=args.jobs, dist_dir=Path(tmp_dir))
+            timings.append(time.perf_counter() - started)
+
+    # ru_maxrss is reported in kilobytes on Linux
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"import: {import_time:.3f}s")
+    for i, elapsed in enumerate(timings, start=1):
+        print(f"build #{i}: {elapsed:.3f}s")
+    print(f"peak memory: {max_rss:.1f} MiB")
+
+
+def run_status(args):
+    if not DB_PATH.exists():
+        print(f"{DB_PATH} does not exist, run `dump` first")
+        return 1
+
+    updated_at = datetime.fromtimestamp(DB_PATH.stat().st_mtime)
+    print(f"{DB_PATH} (updated at {updated_at:%Y-%m-%d %H:%M:%S})")
+    with sqlite3.connect(DB_PATH) as conn:
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        for (table,) in tables.fetchall():
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            print(f"  {table}: {count}")
+
+
+def run_rate_limit(args):
+    from client import GitHubApiClient
+
+    print(json.dumps(GitHubApiClient().get_rate_limit()["resources"], indent=2))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="repo-status")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = subparsers.add_parser("dump", help="Crawl GitHub into github.sqlite")
+    dump_parser.add_argument(
+        "--preview", action="store_true", help="Print the first rows of each table"
+    )
+    dump_parser.add_argument(
+        "--workers", type=int, default=4, help="Number of concurrent requests to GitHub"
+    )
+    dump_parser.set_defaults(func=run_dump)
+
+    reingest_parser = subparsers.add_parser(
+        "reingest", help="Rebuild github.sqlite from the raw archive without calling GitHub"
+    )
+    reingest_parser.add_argument(
+        "--preview", action="store_true", help="Print the first rows of each table"
+    )
+    reingest_parser.add_argument(
+        "--workers", type=int, default=None, help="Number of processes reading the archive"
+    )
+    reingest_parser.set_defaults(func=run_reingest)
+
+    build_parser = subparsers.add_parser("build", help="Render the webpage")
+    build_parser.add_argument(
+        "--jobs", type=int, default=None, help="Number of chart rendering processes"
+    )
+    build_parser.add_argument(
+        "--mode",
+        choices=["iframes", "dashboard"],
+        default="iframes",
+        help="One HTML file per chart, or a single page rendering all charts from one data file",
+    )
+    build_parser.set_defaults(func=run_build)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the rendered webpage")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.set_defaults(func=run_serve)
+
+    bench_parser = subparsers.add_parser("bench", help="Measure build time and memory")
+    bench_parser.add_argument("--repeat", type=int, default=1)
+    bench_parser.add_argument("--jobs", type=int, default=None)
+    bench_parser.set_defaults(func=run_bench)
+
+    status_parser = subparsers.add_parser("status", help="Show the contents of github.sqlite")
+    status_parser.set_defaults(func=run_status)
+
+    rate_limit_parser = subparsers.add_parser("rate-limit", help="Show the GitHub API rate limit")
+    rate_limit_parser.set_defaults(func=run_rate_limit)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
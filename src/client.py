@@ -1,5 +1,7 @@
 import logging
 import os
+import threading
+import time
 
 import requests
 
@@ -8,29 +10,82 @@ GITHUB_TOKEN_ENV_VAR = "GITHUB_TOKEN"
 logger = logging.getLogger(__name__)
 
 
+class RateLimiter:
+    """
+    Tracks the rate limit of each API resource (`core`, `graphql`, ...) from response headers
+    and blocks callers until the limit resets once it is exhausted. Shared by all threads
+    using the same client.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining = {}
+        self.reset = {}
+
+    def wait(self, resource):
+        with self.lock:
+            remaining = self.remaining.get(resource)
+            reset = self.reset.get(resource, 0)
+        if remaining is not None and remaining <= 0:
+            delay = reset - time.time() + 1
+            if delay > 0:
+                logger.warning(f"Rate limit for {resource} exhausted, sleeping {delay:.0f}s")
+                time.sleep(delay)
+
+    def update(self, resource, resp):
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        with self.lock:
+            self.remaining[resource] = int(remaining)
+            self.reset[resource] = int(reset)
+
+
 class GitHubApiClient:
     def __init__(self, per_page=100):
         if GITHUB_TOKEN_ENV_VAR not in os.environ:
             raise Exception(f"{GITHUB_TOKEN_ENV_VAR} must be set")
         self.per_page = per_page
-        self.sess = requests.Session()
-        self.sess.headers.update(
-            {
-                "User-Agent": __name__,
-                "Accept": "application/vnd.github.v3.star+json",
-                "Authorization": "token " + os.getenv(GITHUB_TOKEN_ENV_VAR),
-            }
-        )
-
-    def get(self, end_point, *args, **kwargs):
-        resp = self.sess.get("https://api.github.com" + end_point, *args, **kwargs)
-        resp.raise_for_status()
-        return resp.json()
+        self.rate_limiter = RateLimiter()
+        # requests.Session is not thread-safe, so each thread gets its own session
+        self.local = threading.local()
+
+    @property
+    def sess(self):
+        if not hasattr(self.local, "sess"):
+            sess = requests.Session()
+            sess.headers.update(
+                {
+                    "User-Agent": __name__,
+                    "Accept": "application/vnd.github.v3.star+json",
+                    "Authorization": "token " + os.getenv(GITHUB_TOKEN_ENV_VAR),
+                }
+            )
+            self.local.sess = sess
+        return self.local.sess
 
-    def run_graphql_query(self, query):
-        resp = self.sess.post("https://api.github.com/graphql", json={"query": query})
-        resp.raise_for_status()
-        return resp.json()
+    def request(self, resource, method, url, **kwargs):
+        while True:
+            self.rate_limiter.wait(resource)
+            resp = self.sess.request(method, url, **kwargs)
+            self.rate_limiter.update(resource, resp)
+            if resp.status_code in (403, 429) and resp.headers.get("X-RateLimit-Remaining") == "0":
+                # Exhausted by another thread in the meantime, wait for the reset and retry
+                continue
+            resp.raise_for_status()
+            return resp.json()
+
+    def get(self, end_point, **kwargs):
+        return self.request("core", "GET", "https://api.github.com" + end_point, **kwargs)
+
+    def run_graphql_query(self, query, variables=None):
+        return self.request(
+            "graphql",
+            "POST",
+            "https://api.github.com/graphql",
+            json={"query": query, "variables": variables or {}},
+        )
 
     def get_paginate(self, end_point, params=None):
         page = 1
@@ -135,3 +190,34 @@ query {
             after = page_info["endCursor"]
             if not page_info["hasNextPage"]:
                 break
+
+    def get_pull_request_nodes(self, node_ids):
+        """
+        Fetches the pull requests with the given GraphQL node ids (at most 100) in one query.
+        """
+        query = """
+query($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on PullRequest {
+      id
+      number
+      state
+      merged
+      mergedAt
+      additions
+      deletions
+      changedFiles
+      updatedAt
+      reviews {
+        totalCount
+      }
+    }
+  }
+}
+"""
+        data = self.run_graphql_query(query, variables={"ids": node_ids})
+        for error in data.get("errors", []):
+            logger.warning(error.get("message"))
+        nodes = (data.get("data") or {}).get("nodes") or []
+        # Nodes that are not pull requests (or no longer exist) come back empty or null
+        return [node for node in nodes if node and "id" in node]
@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+CONFIG_PATH = Path("repos.json")
+
+
+class Repo(NamedTuple):
+    owner: str
+    repo: str
+    # Used as the start of the x-axis ticks. Falls back to the date of the first commit.
+    first_commit_date: Optional[datetime] = None
+
+    @property
+    def full_name(self):
+        return f"{self.owner}/{self.repo}"
+
+    @property
+    def url(self):
+        return f"https://github.com/{self.full_name}"
+
+
+class Config(NamedTuple):
+    title: str
+    org: str
+    repos: List[Repo]
+
+
+def load_config(path=CONFIG_PATH):
+    config = json.loads(Path(path).read_text())
+    repos = []
+    for repo in config["repos"]:
+        first_commit_date = repo.get("first_commit_date")
+        repos.append(
+            Repo(
+                owner=repo["owner"],
+                repo=repo["repo"],
+                first_commit_date=first_commit_date
+                and datetime.strptime(first_commit_date, "%Y-%m-%d"),
+            )
+        )
+    return Config(title=config["title"], org=config["org"], repos=repos)
@@ -1,100 +1,282 @@
 import logging
 import sqlite3
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from pprint import pprint
-from typing import NamedTuple
 
-import pandas as pd
-from dateutil.relativedelta import relativedelta
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 import models as M
+from archive import Archive, dedupe, read_partition
 from client import GitHubApiClient
+from config import load_config
+from tdigest import TDigest
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class Repo(NamedTuple):
-    owner: str
-    repo: str
-
-
 class HashableDict(dict):
     def __hash__(self):
         return hash(frozenset(self))
 
 
-def main():
-    db_path = Path("github.sqlite")
-    url = f"sqlite:///{db_path}"
+# Functions to fetch each resource of a repository: (client, repo, since) -> items
+RESOURCES = {
+    "commits": lambda g, repo, since: g.get_commits(repo.owner, repo.repo, params={"since": since}),
+    "contributors": lambda g, repo, since: g.get_contributors(repo.owner, repo.repo),
+    "collaborators": lambda g, repo, since: g.get_collaborators(repo.owner, repo.repo),
+    "issues": lambda g, repo, since: g.get_issues(
+        repo.owner, repo.repo, params={"state": "all", "since": since}
+    ),
+    "discussions": lambda g, repo, since: g.get_discussions(repo.owner, repo.repo),
+    "stargazers": lambda g, repo, since: g.get_stargazers(repo.owner, repo.repo),
+}
+
+
+def fetch(g, repo, resource, since, archive):
+    logger.info(f"Collecting {resource} of {repo.full_name}")
+    items = list(RESOURCES[resource](g, repo, since))
+    archive.write(repo.full_name, resource, items)
+    return items
+
+
+def org_scope(org):
+    return f"orgs/{org}"
+
+
+def to_org_members(members):
+    return set(HashableDict(id=m["id"], login=m["login"]) for m in members)
+
+
+def create_database(db_path):
     if db_path.exists():
         logger.info(f"Removing {db_path}")
         db_path.unlink()
 
-    engine = create_engine(url)
+    engine = create_engine(f"sqlite:///{db_path}")
     M.Base.metadata.create_all(engine)
-    Session = sessionmaker(engine)
+    return sessionmaker(engine)
+
+
+class Ingestor:
+    """
+    Converts raw GitHub objects into models and adds them to `session`. Issues of a repository
+    are held back until its collaborators are known, since the time-to-close sketches are split
+    by maintainer and non-maintainer.
+    """
+
+    def __init__(self, session, org_members):
+        self.session = session
+        self.org_members = org_members
+        self.maintainers = {}
+        self.pending_issues = defaultdict(list)
+        self.latency_digests = defaultdict(TDigest)
+        # Repository -> {pull request node id: updated_at}
+        self.pulls = defaultdict(dict)
+
+    def ingest(self, repo, resource, items):
+        key = repo.full_name
+        if resource == "commits":
+            self.session.add_all(M.Commit.from_gh_objects(items, key))
+        elif resource == "contributors":
+            self.session.add_all(M.User.from_gh_objects(items, key))
+        elif resource == "collaborators":
+            collaborators = set(HashableDict(id=c["id"], login=c["login"]) for c in items)
+            maintainers = self.org_members.union(collaborators)
+            self.session.add_all(M.MlflowOrgMember.from_gh_objects(maintainers, key))
+            self.maintainers[key] = {m["id"] for m in maintainers}
+            for pending in self.pending_issues.pop(key, []):
+                self.ingest_issues(key, pending)
+        elif resource == "issues":
+            if key in self.maintainers:
+                self.ingest_issues(key, items)
+            else:
+                self.pending_issues[key].append(items)
+        elif resource == "discussions":
+            self.session.add_all(M.Discussion.from_gh_objects(items, key))
+        elif resource == "stargazers":
+            self.session.add_all(M.Stargazer.from_gh_objects(items, key))
+        elif resource == "pull_requests":
+            self.session.add_all(M.PullRequest.from_gh_objects(items, key))
+        else:
+            raise ValueError(f"Unknown resource: {resource}")
+
+    def ingest_issues(self, key, items):
+        issues = M.Issue.from_gh_objects(items, key)
+        maintainers = self.maintainers[key]
+        for issue in issues:
+            if issue.is_pr:
+                self.pulls[key][issue.node_id] = issue.updated_at
+            if issue.closed_at is None:
+                continue
+            month = datetime(issue.closed_at.year, issue.closed_at.month, 1)
+            kind = "pr" if issue.is_pr else "issue"
+            author = "maintainer" if issue.user_id in maintainers else "non_maintainer"
+            days = (issue.closed_at - issue.created_at).total_seconds() / 86400
+            self.latency_digests[(key, month, kind, author)].add(days)
+        self.session.add_all(issues)
+
+    def finish(self):
+        if self.pending_issues:
+            raise Exception(f"Collaborators missing for {sorted(self.pending_issues)}")
+        self.session.add_all(M.LatencySketch.from_digests(self.latency_digests))
+
+
+def enrich_pull_requests(g, executor, archive, ingestor, repos, batch_size=100):
+    """
+    Fetches merge status, size and review counts of the pull requests found while ingesting
+    issues, through GraphQL `nodes` queries of `batch_size` pull requests each. Pull requests
+    that have not been updated since they were last fetched are taken from the archive.
+    """
+    known = {}
+    futures = {}
+    for repo in repos:
+        pulls = ingestor.pulls.get(repo.full_name, {})
+        partitions = archive.partitions(repo.full_name, "pull_requests")
+        known[repo] = {
+            pull["id"]: pull
+            for pull in dedupe("pull_requests", [read_partition(p) for p in partitions])
+        }
+        stale = [
+            node_id
+            for node_id, updated_at in pulls.items()
+            if node_id not in known[repo]
+            or M.parse_datetime(known[repo][node_id]["updatedAt"]) < updated_at
+        ]
+        logger.info(f"Enriching {len(stale)} of {len(pulls)} pull requests of {repo.full_name}")
+        # Batches of all the repositories run concurrently, within the GraphQL rate limit
+        futures[repo] = [
+            executor.submit(g.get_pull_request_nodes, stale[i : i + batch_size])
+            for i in range(0, len(stale), batch_size)
+        ]
 
-    repo = Repo("mlflow", "mlflow")
+    for repo in repos:
+        fetched = [pull for future in futures[repo] for pull in future.result()]
+        archive.write(repo.full_name, "pull_requests", fetched)
+        known[repo].update((pull["id"], pull) for pull in fetched)
+        pulls = ingestor.pulls.get(repo.full_name, {})
+        items = [pull for node_id, pull in known[repo].items() if node_id in pulls]
+        ingestor.ingest(repo, "pull_requests", items)
 
+
+def main(preview=False, max_workers=4):
+    config = load_config()
+    db_path = Path("github.sqlite")
+    Session = create_database(db_path)
+    archive = Archive()
+
+    g = GitHubApiClient(per_page=100)
+    pprint(g.get_rate_limit())
+    # Every resource is fetched in full: `reingest` drops the archived objects missing from the
+    # latest fetch, which would also drop older objects if `since` were more recent
+    since = datetime(1970, 1, 1)
+    # since = datetime(2022, 7, 1)
+
+    # Organization members are maintainers of every repository, so fetch them only once
+    logger.info(f"Collecting {config.org} org members")
+    members = list(g.get_organization_members(config.org))
+    archive.write(org_scope(config.org), "members", members)
+    org_members = to_org_members(members)
+
+    # All repositories share one worker pool. Rows are added to the session from this thread
+    # only because SQLAlchemy sessions are not thread-safe.
+    with Session.begin() as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        ingestor = Ingestor(session, org_members)
+        futures = {
+            executor.submit(fetch, g, repo, resource, since, archive): (repo, resource)
+            for repo in config.repos
+            for resource in RESOURCES
+        }
+        for future in as_completed(futures):
+            repo, resource = futures[future]
+            items = future.result()
+            logger.info(f"Collected {len(items)} {resource} of {repo.full_name}")
+            ingestor.ingest(repo, resource, items)
+        enrich_pull_requests(g, executor, archive, ingestor, config.repos)
+        ingestor.finish()
+
+    pprint(g.get_rate_limit())
+
+    if preview:
+        print_preview(db_path)
+
+
+def reingest(preview=False, max_workers=None):
+    """
+    Rebuilds github.sqlite from the raw archive without calling the GitHub API. Partition
+    files are decompressed and parsed in parallel. The existing database is only replaced once
+    the whole archive has been read.
+    """
+    config = load_config()
+    db_path = Path("github.sqlite")
+    archive = Archive()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+
+        def read(scope, resource, required=True):
+            if required and not archive.has_fetched(scope, resource):
+                raise Exception(f"No archived {resource} of {scope}, run `dump` first")
+            partitions = archive.partitions(scope, resource)
+            return [executor.submit(read_partition, path) for path in partitions]
+
+        def snapshot(scope, resource, batches):
+            # Drop the objects that are gone from the latest fetch (e.g. deleted issues or
+            # force-pushed commits), as a fresh dump would
+            keys = archive.latest_keys(scope, resource)
+            return dedupe(resource, [f.result() for f in batches], keys)
+
+        # Submit every partition up front so that they are all parsed concurrently
+        members = read(org_scope(config.org), "members")
+        futures = {
+            (repo, resource): read(repo.full_name, resource)
+            for repo in config.repos
+            for resource in RESOURCES
+        }
+        # Pull requests are only archived once they have been enriched
+        for repo in config.repos:
+            futures[(repo, "pull_requests")] = read(repo.full_name, "pull_requests", required=False)
+
+        org_members = to_org_members(snapshot(org_scope(config.org), "members", members))
+        # Pull requests are only fetched when stale, so they are filtered by the pull requests
+        # found in the issues instead
+        archived = {
+            (repo, resource): snapshot(repo.full_name, resource, batches)
+            for (repo, resource), batches in futures.items()
+            if resource != "pull_requests"
+        }
+        archived_pulls = {
+            repo: dedupe("pull_requests", [f.result() for f in futures[(repo, "pull_requests")]])
+            for repo in config.repos
+        }
+
+    Session = create_database(db_path)
     with Session.begin() as session:
-        g = GitHubApiClient(per_page=100)
-        pprint(g.get_rate_limit())
-        since = datetime(1970, 1, 1)
-        # since = datetime(2022, 7, 1)
-
-        logger.info("Collecting commits")
-        commits = g.get_commits(
-            *repo,
-            params={
-                "since": since,
-            },
-        )
-        session.add_all(M.Commit.from_gh_objects(commits))
-
-        logger.info("Collecting contributors")
-        contributors = g.get_contributors(*repo)
-        session.add_all(M.User.from_gh_objects(contributors))
-
-        logger.info("Collecting mlflow org members")
-        mlflow_org_members = set(
-            HashableDict(id=m["id"], login=m["login"]) for m in g.get_organization_members("mlflow")
-        )
-        collaborators = set(
-            HashableDict(id=c["id"], login=c["login"]) for c in g.get_collaborators(*repo)
-        )
-        session.add_all(M.MlflowOrgMember.from_gh_objects(mlflow_org_members.union(collaborators)))
-
-        logger.info("Collecting issues")
-        issues = g.get_issues(
-            *repo,
-            params={
-                "state": "all",
-                "since": since,
-            },
-        )
-        session.add_all(M.Issue.from_gh_objects(issues))
-
-        logger.info("Collecting discussions")
-        discussions = g.get_discussions(*repo)
-        session.add_all(M.Discussion.from_gh_objects(discussions))
-
-        logger.info("Collecting stargazers")
-        stargazers = g.get_stargazers(*repo)
-        session.add_all(M.Stargazer.from_gh_objects(stargazers))
-
-        pprint(g.get_rate_limit())
+        ingestor = Ingestor(session, org_members)
+        for (repo, resource), items in archived.items():
+            logger.info(f"Re-ingesting {len(items)} {resource} of {repo.full_name}")
+            ingestor.ingest(repo, resource, items)
+        for repo, items in archived_pulls.items():
+            pulls = ingestor.pulls.get(repo.full_name, {})
+            items = [pull for pull in items if pull["id"] in pulls]
+            logger.info(f"Re-ingesting {len(items)} pull_requests of {repo.full_name}")
+            ingestor.ingest(repo, "pull_requests", items)
+        ingestor.finish()
+
+    if preview:
+        print_preview(db_path)
+
+
+def print_preview(db_path):
+    # pandas is only needed for the debug preview, so import it lazily
+    import pandas as pd
 
     with sqlite3.connect(db_path) as conn:
-        print(pd.read_sql("SELECT * FROM commits", conn).head())
-        print(pd.read_sql("SELECT * FROM users", conn).head())
-        print(pd.read_sql("SELECT * FROM mlflow_org_members", conn).head())
-        print(pd.read_sql("SELECT * FROM issues", conn).head())
-        print(pd.read_sql("SELECT * FROM discussions", conn).head())
-        print(pd.read_sql("SELECT * FROM stargazers", conn).head())
+        for table in M.Base.metadata.tables:
+            print(pd.read_sql(f"SELECT * FROM {table}", conn).head())
 
 
 if __name__ == "__main__":
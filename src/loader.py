@@ -0,0 +1,100 @@
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Columns read from each table and their dtypes. Columns that the build does not use (e.g.
+# issue bodies or commit URLs) are not read at all.
+#   - "category": repeated strings (logins, names, states, ...)
+#   - "int": integers downcast to the smallest dtype that fits
+#   - "bool": 0/1 flags
+#   - "datetime": parsed into datetime64 while reading
+#   - "str": kept as Python strings
+SCHEMAS = {
+    "commits": {
+        "repo": "category",
+        "id": "str",
+        "user_id": "int",
+        "user_name": "category",
+        "user_login": "category",
+        "date": "datetime",
+    },
+    "users": {
+        "repo": "category",
+        "id": "int",
+    },
+    "mlflow_org_members": {
+        "repo": "category",
+        "id": "int",
+        "login": "category",
+    },
+    "stargazers": {
+        "repo": "category",
+        "user_id": "int",
+        "starred_at": "datetime",
+    },
+    "discussions": {
+        "repo": "category",
+        "id": "str",
+        "created_at": "datetime",
+    },
+    "issues": {
+        "repo": "category",
+        "id": "int",
+        "user_id": "int",
+        "state": "category",
+        "is_pr": "bool",
+        "created_at": "datetime",
+        "closed_at": "datetime",
+    },
+    "latency_sketches": {
+        "repo": "category",
+        "month": "datetime",
+        "kind": "category",
+        "author": "category",
+        "digest": "str",
+    },
+}
+
+
+def convert_chunk(chunk, schema):
+    for col, dtype in schema.items():
+        if dtype == "category":
+            chunk[col] = chunk[col].astype("category")
+        elif dtype == "bool":
+            chunk[col] = chunk[col].astype(bool)
+        elif dtype == "datetime":
+            # `parse_dates` is not applied when the table is empty
+            chunk[col] = pd.to_datetime(chunk[col])
+    return chunk
+
+
+def read_table(conn, table, chunksize=50_000):
+    """
+    Reads `table` with the dtypes of its schema. Rows are read in chunks and converted as they
+    arrive, so the untyped (object) representation of the whole table is never materialized.
+    """
+    schema = SCHEMAS[table]
+    query = "SELECT {} FROM {}".format(", ".join(schema), table)
+    dates = [col for col, dtype in schema.items() if dtype == "datetime"]
+    chunks = [
+        convert_chunk(chunk, schema)
+        for chunk in pd.read_sql(query, conn, parse_dates=dates, chunksize=chunksize)
+    ]
+    if not chunks:
+        return convert_chunk(pd.read_sql(query, conn, parse_dates=dates), schema)
+
+    # Categoricals are only preserved by concat when all the chunks share the same categories
+    for col, dtype in schema.items():
+        if dtype == "category" and len(chunks) > 1:
+            categories = union_categoricals([chunk[col] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+
+    df = pd.concat(chunks, ignore_index=True)
+    for col, dtype in schema.items():
+        if dtype == "int":
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def load_tables(conn):
+    return {table: read_table(conn, table) for table in SCHEMAS}
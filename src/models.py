@@ -1,7 +1,7 @@
-from ast import Starred
+import json
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -31,21 +31,14 @@ class BaseModel(Base):
 class User(BaseModel):
     __tablename__ = "users"
 
+    repo = Column(String, primary_key=True)
     id = Column(Integer, primary_key=True)
-    login = Column(String, unique=True)
+    login = Column(String)
 
     @classmethod
-    def from_gh_objects(cls, objs):
-        result = []
-        for obj in objs:
-            model = cls.from_gh_object(obj)
-            if model:
-                result.append(model)
-        return result
-
-    @classmethod
-    def from_gh_object(cls, user):
+    def from_gh_object(cls, user, repo):
         return cls(
+            repo=repo,
             id=user["id"],
             login=user["login"],
         )
@@ -54,21 +47,14 @@ class User(BaseModel):
 class MlflowOrgMember(BaseModel):
     __tablename__ = "mlflow_org_members"
 
+    repo = Column(String, primary_key=True)
     id = Column(Integer, primary_key=True)
-    login = Column(String, unique=True)
+    login = Column(String)
 
     @classmethod
-    def from_gh_objects(cls, objs):
-        result = []
-        for obj in objs:
-            model = cls.from_gh_object(obj)
-            if model:
-                result.append(model)
-        return result
-
-    @classmethod
-    def from_gh_object(cls, user):
+    def from_gh_object(cls, user, repo):
         return cls(
+            repo=repo,
             id=user["id"],
             login=user["login"],
         )
@@ -77,18 +63,20 @@ class MlflowOrgMember(BaseModel):
 class Commit(BaseModel):
     __tablename__ = "commits"
 
+    repo = Column(String, primary_key=True)
     id = Column(String(40), primary_key=True)
     html_url = Column(String)
     url = Column(String)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    user_id = Column(Integer, nullable=True)
     user_name = Column(String, nullable=True)
     user_login = Column(String, nullable=True)
     user_email = Column(String, nullable=True)
     date = Column(DateTime)
 
     @classmethod
-    def from_gh_object(cls, commit):
+    def from_gh_object(cls, commit, repo):
         return cls(
+            repo=repo,
             id=commit["sha"],
             url=commit["url"],
             html_url=commit["html_url"],
@@ -104,14 +92,16 @@ class Stargazer(BaseModel):
     __tablename__ = "stargazers"
 
     id = Column(Integer, primary_key=True)
+    repo = Column(String)
     starred_at = Column(DateTime)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer)
 
     @classmethod
-    def from_gh_object(cls, stargazer):
+    def from_gh_object(cls, stargazer, repo):
         if not stargazer["user"]:
             return
         return cls(
+            repo=repo,
             starred_at=parse_datetime(stargazer["starred_at"]),
             user_id=stargazer["user"]["id"],
         )
@@ -122,6 +112,7 @@ class Issue(BaseModel):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, primary_key=True)
+    repo = Column(String)
     number = Column(Integer)
     title = Column(String)
     body = Column(String)
@@ -131,13 +122,15 @@ class Issue(BaseModel):
     updated_at = Column(DateTime)
     html_url = Column(String)
     is_pr = Column(Boolean)
+    node_id = Column(String)
 
     @classmethod
-    def from_gh_object(cls, issue):
+    def from_gh_object(cls, issue, repo):
         closed_at = issue.get("closed_at")
         return cls(
             id=issue["id"],
             user_id=issue["user"]["id"],
+            repo=repo,
             number=issue["number"],
             title=issue["title"],
             body=issue["body"],
@@ -147,6 +140,41 @@ class Issue(BaseModel):
             updated_at=parse_datetime(issue["updated_at"]),
             html_url=issue["html_url"],
             is_pr="pull_request" in issue,
+            node_id=issue["node_id"],
+        )
+
+
+class PullRequest(BaseModel):
+    __tablename__ = "pull_requests"
+
+    # GraphQL node id, same as `Issue.node_id`
+    id = Column(String, primary_key=True)
+    repo = Column(String)
+    number = Column(Integer)
+    state = Column(String)
+    merged = Column(Boolean)
+    merged_at = Column(DateTime, nullable=True)
+    additions = Column(Integer)
+    deletions = Column(Integer)
+    changed_files = Column(Integer)
+    reviews = Column(Integer)
+    updated_at = Column(DateTime)
+
+    @classmethod
+    def from_gh_object(cls, pull, repo):
+        merged_at = pull.get("mergedAt")
+        return cls(
+            id=pull["id"],
+            repo=repo,
+            number=pull["number"],
+            state=pull["state"],
+            merged=pull["merged"],
+            merged_at=merged_at and parse_datetime(merged_at),
+            additions=pull["additions"],
+            deletions=pull["deletions"],
+            changed_files=pull["changedFiles"],
+            reviews=pull["reviews"]["totalCount"],
+            updated_at=parse_datetime(pull["updatedAt"]),
         )
 
 
@@ -154,6 +182,7 @@ class Discussion(BaseModel):
     __tablename__ = "discussions"
 
     id = Column(String, primary_key=True)
+    repo = Column(String)
     number = Column(Integer)
     url = Column(String)
     title = Column(String)
@@ -162,9 +191,10 @@ class Discussion(BaseModel):
     updated_at = Column(DateTime)
 
     @classmethod
-    def from_gh_object(cls, discussion):
+    def from_gh_object(cls, discussion, repo):
         return cls(
             id=discussion["id"],
+            repo=repo,
             number=discussion["number"],
             url=discussion["url"],
             title=discussion["title"],
@@ -172,3 +202,32 @@ class Discussion(BaseModel):
             created_at=parse_datetime(discussion["createdAt"]),
             updated_at=parse_datetime(discussion["updatedAt"]),
         )
+
+
+class LatencySketch(BaseModel):
+    __tablename__ = "latency_sketches"
+
+    repo = Column(String, primary_key=True)
+    # First day of the month the issues were closed in
+    month = Column(DateTime, primary_key=True)
+    # "pr" or "issue"
+    kind = Column(String, primary_key=True)
+    # "maintainer" or "non_maintainer"
+    author = Column(String, primary_key=True)
+    count = Column(Integer)
+    # JSON-serialized t-digest of the time to close in days
+    digest = Column(String)
+
+    @classmethod
+    def from_digests(cls, digests):
+        return [
+            cls(
+                repo=repo,
+                month=month,
+                kind=kind,
+                author=author,
+                count=digest.count,
+                digest=json.dumps(digest.to_dict()),
+            )
+            for (repo, month, kind, author), digest in digests.items()
+        ]
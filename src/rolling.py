@@ -0,0 +1,51 @@
+import heapq
+from collections import Counter, deque
+from typing import List, NamedTuple, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+
+class WindowSnapshot(NamedTuple):
+    month: object
+    # Number of distinct keys with at least one event in the window
+    active: int
+    # The keys with the most events in the window, as (key, count) pairs
+    top: List[Tuple[str, int]]
+
+
+def sliding_window_history(events, months, window=relativedelta(months=6), top=3):
+    """
+    Computes a `WindowSnapshot` for each month in `months` (sorted month starts) over the window
+    that ends with that month, e.g. the last 6 months as of the end of the month.
+
+    `events` are `(date, key)` pairs sorted by date. They are consumed in a single pass: each
+    event enters the per-key counts once when the window end passes it and leaves them once when
+    the window start passes it. Picking the top keys scans every key active in the window, so the
+    whole history costs O(len(events) + len(months) * active) where `active` is the largest
+    number of keys active in a window.
+    """
+    events = iter(events)
+    in_window = deque()
+    counts = Counter()
+    history = []
+    upcoming = next(events, None)
+    for month in months:
+        end = month + relativedelta(months=1)
+        start = end - window
+        while upcoming is not None and upcoming[0] < end:
+            in_window.append(upcoming)
+            counts[upcoming[1]] += 1
+            upcoming = next(events, None)
+        while in_window and in_window[0][0] < start:
+            _, key = in_window.popleft()
+            counts[key] -= 1
+            if counts[key] == 0:
+                del counts[key]
+        history.append(
+            WindowSnapshot(
+                month=month,
+                active=len(counts),
+                top=heapq.nlargest(top, counts.items(), key=lambda item: item[1]),
+            )
+        )
+    return history
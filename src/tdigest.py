@@ -0,0 +1,110 @@
+import bisect
+import math
+
+
+class TDigest:
+    """
+    A merging t-digest (Dunning & Ertl) for streaming quantile estimation in bounded memory.
+
+    Values are buffered and periodically merged into at most ~`compression` centroids. Digests
+    built from disjoint streams (e.g. different months or repositories) can be merged into a
+    digest of the combined stream. The algorithm is deterministic, so the same input always
+    yields the same digest.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []
+        self.buffer = []
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self):
+        return sum(w for _, w in self.centroids) + sum(w for _, w in self.buffer)
+
+    def add(self, value, weight=1):
+        self.buffer.append((value, weight))
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= self.compression * 5:
+            self.compress()
+
+    def merge(self, other):
+        self.buffer.extend(other.centroids)
+        self.buffer.extend(other.buffer)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress()
+        return self
+
+    def _q_limit(self, q):
+        # Inverse of the k1 scale function k(q) = compression / (2 pi) * asin(2q - 1) at k(q) + 1
+        k = math.asin(2 * q - 1) + 2 * math.pi / self.compression
+        return (math.sin(min(k, math.pi / 2)) + 1) / 2
+
+    def compress(self):
+        if not self.buffer:
+            return
+        points = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = sum(w for _, w in points)
+        merged = []
+        mean, weight = points[0]
+        weight_so_far = 0
+        q_limit = total * self._q_limit(0)
+        for m, w in points[1:]:
+            if weight_so_far + weight + w <= q_limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                merged.append((mean, weight))
+                weight_so_far += weight
+                q_limit = total * self._q_limit(weight_so_far / total)
+                mean, weight = m, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q):
+        """
+        Returns the estimated `q`-quantile (0 <= q <= 1), or None if the digest is empty.
+        """
+        self.compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+
+        total = sum(w for _, w in self.centroids)
+        target = q * total
+        # Interpolate between the centers of adjacent centroids, using min and max as the edges
+        centers = []
+        cumulative = 0
+        for _, w in self.centroids:
+            centers.append(cumulative + w / 2)
+            cumulative += w
+        xs = [0] + centers + [total]
+        ys = [self.min] + [m for m, _ in self.centroids] + [self.max]
+        i = min(max(bisect.bisect_left(xs, target), 1), len(xs) - 1)
+        x0, x1 = xs[i - 1], xs[i]
+        y0, y1 = ys[i - 1], ys[i]
+        if x1 == x0:
+            return y1
+        return y0 + (target - x0) / (x1 - x0) * (y1 - y0)
+
+    def to_dict(self):
+        self.compress()
+        return {
+            "compression": self.compression,
+            "min": self.min,
+            "max": self.max,
+            "centroids": [[m, w] for m, w in self.centroids],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        digest = cls(compression=d["compression"])
+        digest.min = d["min"]
+        digest.max = d["max"]
+        digest.centroids = [(m, w) for m, w in d["centroids"]]
+        return digest